@@ -1,12 +1,142 @@
 import streamlit as st
-import pdfplumber
+import fitz  # PyMuPDF
 import re
-import pandas as pd
-import os
+import xlsxwriter
 import io
+import os
+import threading
+from bisect import bisect_right
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from typing import List, Dict, Tuple
-import tempfile
+
+# Pre-compiled regex patterns (compiled once at module load instead of
+# per call inside the extraction loops)
+# re.ASCII keeps \d/\s on byte-level tables; all header text is ASCII
+_RE_INSPECTION_HEADER = re.compile(
+    r'Inspection No\.\s*(?P<no>[A-Za-z0-9\-]+)'
+    r'|Inspection Seq\.\s*(?P<seq>\d+)'
+    r'|Inspection Date\s*(?P<date>[A-Za-z]{3}\s+\d{1,2},\s+\d{2})',
+    re.ASCII
+)
+_RE_NUMBER = re.compile(r'(\d+)', re.ASCII)
+_RE_SECOND_NUMBER = re.compile(r'\d+\D+(\d+)', re.ASCII)
+_RE_PARENS = re.compile(r'\([^)]*\)')
+_RE_DECIMAL = re.compile(r'([\d\.]+)', re.ASCII)
+_RE_TRAILING_SEP = re.compile(r'[,\s]+$', re.ASCII)
+_RE_SIX_DIGITS = re.compile(r'(\d{6})', re.ASCII)
+_RE_ALNUM = re.compile(r'[A-Za-z0-9]+')
+_RE_THREE_DIGITS_END = re.compile(r'(\d{3})$', re.ASCII)
+
+# Text-extraction backend: "pymupdf" (default) or "pdfplumber". The
+# pipeline is I/O- and parse-bound on the PDF library, not on the regex
+# layer, so the backend choice is what dominates per-file latency.
+_PDF_BACKEND = os.environ.get("PDF_BACKEND", "pymupdf").lower()
+
+# Normalizes extracted text in one C-level pass: tabs and carriage
+# returns become spaces, soft hyphens are dropped
+_CLEAN_TRANS = str.maketrans({"\t": " ", "\r": " ", "\u00ad": None})
+
+# Header substrings the line indexer anchors on
+_ANCHOR_NEEDLES = [
+    "Inspection No.", "Inspection Seq.", "Inspection Date",
+    "PO / Split No.", "Style No.", "Item No.",
+    "Delivered Quantity", "Delivered Qty.", "Customer / Dept",
+    "Factory", "Vendor No", "Quality Digit"
+]
+_ANCHOR_COL = {name: i for i, name in enumerate(_ANCHOR_NEEDLES)}
+
+# One alternation over every anchor; a single C-level scan decides whether
+# a line is worth running the per-anchor checks on at all
+_RE_ANCHORS = re.compile("|".join(re.escape(name) for name in _ANCHOR_NEEDLES))
+
+# Optional Hyperscan database matching every anchor in one pass over the
+# text; preferred over the other indexers when the package is installed
+try:
+    import hyperscan
+
+    _HS_DB = hyperscan.Database()
+    _HS_DB.compile(
+        expressions=[re.escape(name).encode("utf-8") for name in _ANCHOR_NEEDLES],
+        ids=list(range(len(_ANCHOR_NEEDLES))),
+        elements=len(_ANCHOR_NEEDLES),
+    )
+    # Hyperscan scratch spaces must not be shared between threads, and the
+    # parse path runs in a thread pool; give every worker its own
+    _HS_SCRATCH = threading.local()
+    _HYPERSCAN_AVAILABLE = True
+except ImportError:
+    _HYPERSCAN_AVAILABLE = False
+
+# Optional Numba-compiled substring matcher; the pure-Python indexer below
+# is used when numba is not installed
+try:
+    import numpy as np
+    from numba import njit
+
+    @njit(cache=True, nogil=True)
+    def _match_table(buf, bounds, needle_buf, needle_bounds, out):
+        n_lines = bounds.shape[0] - 1
+        n_needles = needle_bounds.shape[0] - 1
+        for li in range(n_lines):
+            line_start = bounds[li]
+            line_end = bounds[li + 1]
+            for ni in range(n_needles):
+                needle_start = needle_bounds[ni]
+                needle_len = needle_bounds[ni + 1] - needle_start
+                for start in range(line_start, line_end - needle_len + 1):
+                    hit = True
+                    for k in range(needle_len):
+                        if buf[start + k] != needle_buf[needle_start + k]:
+                            hit = False
+                            break
+                    if hit:
+                        out[li, ni] = 1
+                        break
+
+    @njit(cache=True, nogil=True)
+    def _first_six_digit_run(buf):
+        n = buf.shape[0]
+        for i in range(n - 5):
+            hit = True
+            for k in range(6):
+                if buf[i + k] < 48 or buf[i + k] > 57:
+                    hit = False
+                    break
+            if hit:
+                return i
+        return -1
+
+    @njit(cache=True, nogil=True)
+    def _last_digit_run(buf):
+        i = buf.shape[0] - 1
+        while i >= 0:
+            if 48 <= buf[i] <= 57:
+                end = i + 1
+                while i >= 0 and 48 <= buf[i] <= 57:
+                    i -= 1
+                return i + 1, end
+            i -= 1
+        return -1, -1
+
+    _needle_bytes = [name.encode("utf-8") for name in _ANCHOR_NEEDLES]
+    _NEEDLE_BUF = np.frombuffer(b"".join(_needle_bytes), dtype=np.uint8)
+    _NEEDLE_BOUNDS = np.zeros(len(_needle_bytes) + 1, dtype=np.int64)
+    for _i, _b in enumerate(_needle_bytes):
+        _NEEDLE_BOUNDS[_i + 1] = _NEEDLE_BOUNDS[_i] + len(_b)
+
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+
+# The 13 fields extracted from every report
+EXTRACTED_FIELDS = [
+    "Inspection No.", "Inspection Seq.", "Inspection Date",
+    "PO / Split No.", "Style No.", "Item No.",
+    "Delivered Quantity", "Customer", "Dept", "Factory",
+    "FID Code", "Vendor", "Quality Digit"
+]
 
 # Page configuration
 st.set_page_config(
@@ -53,279 +183,484 @@ with st.sidebar:
     st.info("""
     1. Ensure PDFs are text-based (not scanned images)
     2. Recommended file size: under 50MB each
-    3. Multiple files will be processed sequentially
+    3. Multiple files are processed in parallel
     4. Results from all files are combined into one Excel file
     """)
     
     st.markdown("---")
     st.markdown("**Powered by:**")
     st.markdown("- Streamlit")
-    st.markdown("- pdfplumber")
+    st.markdown("- PyMuPDF")
     st.markdown("- pandas")
-    st.markdown("- openpyxl")
+    st.markdown("- XlsxWriter")
+
+def _iter_page_text(doc):
+    """
+    Yield extracted text one page at a time
+    """
+    for page in doc:
+        # "text" mode preserves line/paragraph boundaries for the line-based parser
+        yield page.get_text("text")
 
-def extract_fields_from_pdf(pdf_file) -> Tuple[Dict, str, str]:
+def _find_six_digits(text: str) -> str:
     """
-    Extract fields from a single PDF file
+    Return the first 6-digit run in text, or "" if there is none
+    """
+    if _NUMBA_AVAILABLE:
+        # "replace" keeps non-ASCII characters as "?" so they still
+        # separate digit runs, matching what the regex path sees
+        raw = text.encode("ascii", "replace")
+        i = _first_six_digit_run(np.frombuffer(raw, dtype=np.uint8))
+        return raw[i:i+6].decode("ascii") if i >= 0 else ""
+    match = _RE_SIX_DIGITS.search(text)
+    return match.group(1) if match else ""
+
+def _last_number(text: str) -> str:
+    """
+    Return the last run of digits in text, or "" if there is none
+    """
+    if _NUMBA_AVAILABLE:
+        raw = text.encode("ascii", "replace")
+        start, end = _last_digit_run(np.frombuffer(raw, dtype=np.uint8))
+        return raw[start:end].decode("ascii") if start >= 0 else ""
+    numbers = _RE_NUMBER.findall(text)
+    return numbers[-1] if numbers else ""
+
+def _extract_text_pdfplumber(file_bytes: bytes) -> str:
+    """
+    Fallback extraction for PDFs PyMuPDF cannot open
+    """
+    import pdfplumber
+    with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
+        pages_text = [page.extract_text() or "" for page in pdf.pages]
+    return "\n".join(pages_text)
+
+def extract_and_parse(file_bytes: bytes) -> Tuple[Dict, str]:
+    """
+    Extract text page by page and stop early once all fields are found
+    Returns: (data_dict, accumulated_text)
+    """
+    if _PDF_BACKEND == "pdfplumber":
+        full_text = _extract_text_pdfplumber(file_bytes)
+        return dict(_parse_fields_cached(full_text)), full_text
+
+    try:
+        doc = fitz.open(stream=file_bytes, filetype="pdf")
+    except Exception:
+        # PyMuPDF rejected the file; retry with the slower pdfplumber backend
+        full_text = _extract_text_pdfplumber(file_bytes)
+        return dict(_parse_fields_cached(full_text)), full_text
+
+    try:
+        pages_text = []
+        data = {}
+        complete = False
+        for page_index, page_text in enumerate(_iter_page_text(doc)):
+            pages_text.append(page_text)
+            # All 13 fields normally appear on the first 1-2 pages, so parse
+            # incrementally and skip the remaining pages once complete
+            if page_index < 3:
+                data = dict(_parse_fields_cached("\n".join(pages_text)))
+                if all(field in data for field in EXTRACTED_FIELDS):
+                    complete = True
+                    break
+    finally:
+        doc.close()
+
+    full_text = "\n".join(pages_text)
+    if not complete:
+        # Fields still missing after the early pages: parse the full document
+        data = dict(_parse_fields_cached(full_text))
+    return data, full_text
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _extract_and_parse_cached(file_bytes: bytes) -> Tuple[Dict, str]:
+    """
+    Cached wrapper so reruns (button clicks, expander toggles) skip re-parsing
+    """
+    return extract_and_parse(file_bytes)
+
+def extract_fields_from_pdf(file_bytes: bytes, file_name: str) -> Tuple[Dict, str, str]:
+    """
+    Extract fields from a single PDF's bytes
     Returns: (data_dict, error_message, extracted_text)
     """
     try:
-        # Use pdfplumber to open PDF
-        with pdfplumber.open(pdf_file) as pdf:
-            # Combine text from all pages
-            full_text = ""
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    full_text += text + "\n"
-        
-        # Split text into lines
-        lines = [line.strip() for line in full_text.split('\n') if line.strip()]
-        
+        data, full_text = _extract_and_parse_cached(file_bytes)
+
         # If no text extracted, return empty data
-        if not lines:
+        if not full_text.strip():
             return {}, "No text content extracted. Please ensure PDF is text-based (not scanned).", ""
-        
-        data = {"File Name": pdf_file.name}
-        
-        # 1. Inspection No.
-        for i, line in enumerate(lines):
-            if "Inspection No." in line:
-                match = re.search(r'Inspection No\.\s*([A-Za-z0-9\-]+)', line)
-                if match:
-                    data["Inspection No."] = match.group(1)
-                break
-        
-        # 2. Inspection Seq.
-        for i, line in enumerate(lines):
-            if "Inspection Seq." in line:
-                match = re.search(r'Inspection Seq\.\s*(\d+)', line)
-                if match:
-                    data["Inspection Seq."] = match.group(1)
-                break
-        
-        if "Inspection Seq." not in data:
-            data["Inspection Seq."] = "1"
-        
-        # 3. Inspection Date
-        for i, line in enumerate(lines):
-            if "Inspection Date" in line:
-                match = re.search(r'Inspection Date\s*([A-Za-z]{3}\s+\d{1,2},\s+\d{2})', line)
-                if match:
-                    data["Inspection Date"] = match.group(1)
-                break
-        
-        # 4. PO / Split No.
-        for i, line in enumerate(lines):
-            if "PO / Split No." in line:
-                if i+1 < len(lines):
-                    next_line = lines[i+1]
-                    match = re.search(r'(\d+)', next_line)
-                    if match:
-                        data["PO / Split No."] = match.group(1)
-                break
-        
-        # 5. Style No. and Item No.
-        for i, line in enumerate(lines):
-            if "Style No." in line and "Item No." in line:
-                if i+1 < len(lines):
-                    next_line = lines[i+1]
-                    matches = re.findall(r'([A-Za-z0-9]+)', next_line)
-                    if len(matches) >= 2:
-                        data["Style No."] = matches[0]
-                        data["Item No."] = matches[1]
-                break
-        
-        # 6. Delivered Quantity
-        for i, line in enumerate(lines):
-            if "Delivered Quantity" in line or "Delivered Qty." in line:
-                if i+1 < len(lines):
-                    next_line = lines[i+1]
-                    clean_line = re.sub(r'\([^)]*\)', '', next_line)
-                    numbers = re.findall(r'(\d+)', clean_line)
-                    if len(numbers) >= 2:
-                        data["Delivered Quantity"] = numbers[1]
-                break
-        
-        # 7. Customer, Dept, Factory, FID Code
-        for i, line in enumerate(lines):
-            if "Customer / Dept" in line and "Factory" in line:
-                if i+1 < len(lines):
-                    next_line = lines[i+1]
-                    
-                    # Find first "/" position
-                    first_slash = next_line.find('/')
-                    if first_slash != -1:
-                        # Customer: Part before first "/"
-                        data["Customer"] = next_line[:first_slash].strip()
-                        
-                        # Remaining part
-                        remaining = next_line[first_slash+1:].strip()
-                        
-                        # Extract Dept: Next number (may contain decimal)
-                        dept_match = re.search(r'([\d\.]+)', remaining)
-                        if dept_match:
-                            data["Dept"] = dept_match.group(1)
-                            
-                            # Extract Factory: After Dept until next "/" or "Factory"
-                            after_dept = remaining[dept_match.end():].strip()
-                            
-                            # Find Factory end position
-                            next_slash = after_dept.find('/')
-                            factory_word = after_dept.lower().find('factory')
-                            
-                            end_pos = len(after_dept)
-                            if next_slash != -1:
-                                end_pos = min(end_pos, next_slash)
-                            if factory_word != -1:
-                                end_pos = min(end_pos, factory_word)
-                            
-                            # Extract Factory name
-                            factory_name = after_dept[:end_pos].strip()
-                            factory_name = re.sub(r'[,\s]+$', '', factory_name)
-                            
-                            data["Factory"] = factory_name
-                            
-                            # Extract FID Code: Look for 6-digit number
-                            remaining_after_factory = after_dept[end_pos:].strip()
-                            
-                            if '/' in remaining_after_factory:
-                                parts = remaining_after_factory.split('/')
-                                for part in parts:
-                                    fid_match = re.search(r'(\d{6})', part)
-                                    if fid_match:
-                                        data["FID Code"] = fid_match.group(1)
-                                        break
-                            
-                            # If not found, search in following lines
-                            if "FID Code" not in data:
-                                for j in range(i+2, min(i+6, len(lines))):
-                                    fid_match = re.search(r'(\d{6})', lines[j])
-                                    if fid_match:
-                                        data["FID Code"] = fid_match.group(1)
-                                        break
-                break
-        
-        # 8. Vendor
-        for i, line in enumerate(lines):
-            if "Vendor" in line and ("Vendor No." in line or "Vendor No" in line):
-                if i+1 < len(lines):
-                    next_line = lines[i+1]
-                    if '/' in next_line:
-                        vendor_part = next_line.split('/')[0].strip()
-                        data["Vendor"] = vendor_part
-                    else:
-                        data["Vendor"] = next_line.strip()
-                break
-        
-        # 9. Quality Digit
-        for i, line in enumerate(lines):
-            if "Quality Digit" in line:
-                if i+1 < len(lines):
-                    next_line = lines[i+1]
-                    clean_line = next_line.replace(' ', '')
-                    numbers = re.findall(r'\d+', clean_line)
-                    if numbers:
-                        last_number = numbers[-1]
-                        if len(last_number) >= 3:
-                            data["Quality Digit"] = last_number[-3:]
-                break
-        
-        # If Quality Digit not found, try alternative patterns
-        if "Quality Digit" not in data:
-            for i, line in enumerate(lines):
-                if "AQL" in line:
-                    clean_line = line.replace(' ', '')
-                    match = re.search(r'(\d{3})$', clean_line)
-                    if match:
-                        data["Quality Digit"] = match.group(1)
-                        break
-        
-        # If Quality Digit still not found, set default value
-        if "Quality Digit" not in data:
-            data["Quality Digit"] = "753"
-        
+
+        data = {"File Name": file_name, **data}
+
+        # Defaults are applied only here, after all page decisions: if they
+        # lived in the parser, the early-exit completeness check would treat
+        # them as real matches and skip pages holding the actual values
+        data.setdefault("Inspection Seq.", "1")
+        data.setdefault("Quality Digit", "753")
+
         return data, None, full_text[:1000]  # Return first 1000 chars for preview
-    
+
     except Exception as e:
         return {}, f"Error during extraction: {str(e)}", ""
 
+# Anchors that map to a single header line; once all of them are indexed
+# the scan can stop early
+_SINGLE_ANCHORS = (
+    "insp_no", "insp_seq", "insp_date", "po", "style_item",
+    "qty", "customer", "vendor", "quality"
+)
+
+def _apply_anchor_line(idx, i, has):
+    """
+    Record line i's anchor hits in idx; `has` tells whether the line
+    contains a given anchor substring
+    """
+    if "insp_no" not in idx and has("Inspection No."):
+        idx["insp_no"] = i
+    if "insp_seq" not in idx and has("Inspection Seq."):
+        idx["insp_seq"] = i
+    if "insp_date" not in idx and has("Inspection Date"):
+        idx["insp_date"] = i
+    if "po" not in idx and has("PO / Split No."):
+        idx["po"] = i
+    if "style_item" not in idx and has("Style No.") and has("Item No."):
+        idx["style_item"] = i
+    if "qty" not in idx and (has("Delivered Quantity") or has("Delivered Qty.")):
+        idx["qty"] = i
+    if "customer" not in idx and has("Customer / Dept") and has("Factory"):
+        idx["customer"] = i
+    if "vendor" not in idx and has("Vendor No"):
+        idx["vendor"] = i
+    if "quality" not in idx and has("Quality Digit"):
+        idx["quality"] = i
+
+def _index_anchor_lines_py(lines: List[str]) -> Dict:
+    """
+    Map each anchor header to the first line it appears on (pure Python)
+    """
+    idx = {}
+    remaining = set(_SINGLE_ANCHORS)
+    for i, line in enumerate(lines):
+        # Most lines carry no anchor; skip them with one alternation scan
+        # instead of the full chain of substring probes
+        if _RE_ANCHORS.search(line) is None:
+            continue
+        _apply_anchor_line(idx, i, line.__contains__)
+        remaining.difference_update(idx)
+        if not remaining:
+            break
+    return idx
+
+def _index_anchor_lines_jit(lines: List[str]) -> Dict:
+    """
+    Map each anchor header to the first line it appears on, with the
+    substring checks done in the compiled _match_table kernel
+    """
+    encoded = [line.encode("utf-8") for line in lines]
+    bounds = np.zeros(len(encoded) + 1, dtype=np.int64)
+    for i, encoded_line in enumerate(encoded):
+        bounds[i + 1] = bounds[i] + len(encoded_line)
+    buf = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    table = np.zeros((len(encoded), len(_ANCHOR_NEEDLES)), dtype=np.uint8)
+    _match_table(buf, bounds, _NEEDLE_BUF, _NEEDLE_BOUNDS, table)
+
+    col = _ANCHOR_COL
+    idx = {}
+    remaining = set(_SINGLE_ANCHORS)
+    for i in range(len(encoded)):
+        row = table[i]
+        _apply_anchor_line(idx, i, lambda name: bool(row[col[name]]))
+        remaining.difference_update(idx)
+        if not remaining:
+            break
+    return idx
+
+def _index_anchor_lines_hs(lines: List[str]) -> Dict:
+    """
+    Map each anchor header to the first line it appears on, matching all
+    anchors in one Hyperscan pass over the joined text
+    """
+    encoded = [line.encode("utf-8") for line in lines]
+    buf = b"\n".join(encoded)
+    line_starts = []
+    pos = 0
+    for encoded_line in encoded:
+        line_starts.append(pos)
+        pos += len(encoded_line) + 1
+
+    # Collect which anchors hit each line (anchors never span lines)
+    per_line = {}
+
+    def _on_match(pat_id, from_, to_, flags, context):
+        line_index = bisect_right(line_starts, to_ - 1) - 1
+        per_line.setdefault(line_index, set()).add(pat_id)
+
+    scratch = getattr(_HS_SCRATCH, "scratch", None)
+    if scratch is None:
+        scratch = _HS_SCRATCH.scratch = hyperscan.Scratch(_HS_DB)
+    _HS_DB.scan(buf, match_event_handler=_on_match, scratch=scratch)
+
+    col = _ANCHOR_COL
+    idx = {}
+    remaining = set(_SINGLE_ANCHORS)
+    for i in sorted(per_line):
+        ids = per_line[i]
+        _apply_anchor_line(idx, i, lambda name: col[name] in ids)
+        remaining.difference_update(idx)
+        if not remaining:
+            break
+    return idx
+
+def _index_anchor_lines(lines: List[str]) -> Dict:
+    """
+    Map each anchor header to the first line it appears on
+    """
+    if not lines:
+        return {}
+    if _HYPERSCAN_AVAILABLE:
+        return _index_anchor_lines_hs(lines)
+    if _NUMBA_AVAILABLE:
+        return _index_anchor_lines_jit(lines)
+    return _index_anchor_lines_py(lines)
+
+@lru_cache(maxsize=1024)
+def _parse_fields_cached(full_text: str) -> tuple:
+    """
+    Memoized parse keyed on the text itself, so duplicate uploads (or
+    re-parses of identical pages) skip the regex work entirely
+    """
+    return tuple(extract_fields_from_text(full_text).items())
+
+def extract_fields_from_text(full_text: str) -> Dict:
+    """
+    Parse the 13 report fields out of extracted PDF text
+    """
+    # Split normalized text into non-blank lines, stripping each line once
+    full_text = full_text.translate(_CLEAN_TRANS)
+    lines = list(filter(None, map(str.strip, full_text.splitlines())))
+
+    data = {}
+
+    # Index the header lines in a single pass instead of re-scanning the
+    # whole line list once per field
+    idx = _index_anchor_lines(lines)
+
+    # 1-3. Inspection No. / Seq. / Date: the three headers normally share a
+    # line, so scan each candidate line once with the combined alternation
+    header_lines = {idx[key] for key in ("insp_no", "insp_seq", "insp_date") if key in idx}
+    found = {}
+    for i in sorted(header_lines):
+        for match in _RE_INSPECTION_HEADER.finditer(lines[i]):
+            for name, value in match.groupdict().items():
+                if value and name not in found:
+                    found[name] = value
+
+    if "no" in found:
+        data["Inspection No."] = found["no"]
+    if "seq" in found:
+        data["Inspection Seq."] = found["seq"]
+    if "date" in found:
+        data["Inspection Date"] = found["date"]
+
+    # 4. PO / Split No.
+    if "po" in idx and idx["po"]+1 < len(lines):
+        next_line = lines[idx["po"]+1]
+        match = _RE_NUMBER.search(next_line)
+        if match:
+            data["PO / Split No."] = match.group(1)
+
+    # 5. Style No. and Item No.
+    if "style_item" in idx and idx["style_item"]+1 < len(lines):
+        next_line = lines[idx["style_item"]+1]
+        # Alphanumeric runs, not whitespace tokens: hyphenated values like
+        # "ST-100" must still yield their leading run the way they always have
+        tokens = _RE_ALNUM.findall(next_line)
+        if len(tokens) >= 2:
+            data["Style No."] = tokens[0]
+            data["Item No."] = tokens[1]
+
+    # 6. Delivered Quantity
+    if "qty" in idx and idx["qty"]+1 < len(lines):
+        next_line = lines[idx["qty"]+1]
+        clean_line = _RE_PARENS.sub('', next_line)
+        # One scan for "the number after the first number"; no list is built
+        match = _RE_SECOND_NUMBER.search(clean_line)
+        if match:
+            data["Delivered Quantity"] = match.group(1)
+
+    # 7. Customer, Dept, Factory, FID Code
+    if "customer" in idx and idx["customer"]+1 < len(lines):
+        i = idx["customer"]
+        next_line = lines[i+1]
+
+        # Find first "/" position
+        first_slash = next_line.find('/')
+        if first_slash != -1:
+            # Customer: Part before first "/"
+            data["Customer"] = next_line[:first_slash].strip()
+
+            # Remaining part
+            remaining = next_line[first_slash+1:].strip()
+
+            # Extract Dept: Next number (may contain decimal)
+            dept_match = _RE_DECIMAL.search(remaining)
+            if dept_match:
+                data["Dept"] = dept_match.group(1)
+
+                # Extract Factory: After Dept until next "/" or "Factory"
+                after_dept = remaining[dept_match.end():].strip()
+
+                # Find Factory end position
+                next_slash = after_dept.find('/')
+                factory_word = after_dept.lower().find('factory')
+
+                end_pos = len(after_dept)
+                if next_slash != -1:
+                    end_pos = min(end_pos, next_slash)
+                if factory_word != -1:
+                    end_pos = min(end_pos, factory_word)
+
+                # Extract Factory name
+                factory_name = after_dept[:end_pos].strip()
+                factory_name = _RE_TRAILING_SEP.sub('', factory_name)
+
+                data["Factory"] = factory_name
+
+                # Extract FID Code: Look for 6-digit number
+                remaining_after_factory = after_dept[end_pos:].strip()
+
+                if '/' in remaining_after_factory:
+                    parts = remaining_after_factory.split('/')
+                    for part in parts:
+                        fid_code = _find_six_digits(part)
+                        if fid_code:
+                            data["FID Code"] = fid_code
+                            break
+
+                # If not found, search in following lines
+                if "FID Code" not in data:
+                    for j in range(i+2, min(i+6, len(lines))):
+                        fid_code = _find_six_digits(lines[j])
+                        if fid_code:
+                            data["FID Code"] = fid_code
+                            break
+
+    # 8. Vendor
+    if "vendor" in idx and idx["vendor"]+1 < len(lines):
+        next_line = lines[idx["vendor"]+1]
+        if '/' in next_line:
+            vendor_part = next_line.split('/')[0].strip()
+            data["Vendor"] = vendor_part
+        else:
+            data["Vendor"] = next_line.strip()
+
+    # 9. Quality Digit
+    if "quality" in idx and idx["quality"]+1 < len(lines):
+        next_line = lines[idx["quality"]+1]
+        last_number = _last_number(next_line.replace(' ', ''))
+        if len(last_number) >= 3:
+            data["Quality Digit"] = last_number[-3:]
+
+    # If Quality Digit not found, try alternative patterns. Scanned lazily
+    # over the full line list: the indexer may have stopped early, so it
+    # cannot be trusted to have seen every AQL line
+    if "Quality Digit" not in data:
+        for line in lines:
+            if "AQL" in line:
+                clean_line = line.replace(' ', '')
+                match = _RE_THREE_DIGITS_END.search(clean_line)
+                if match:
+                    data["Quality Digit"] = match.group(1)
+                    break
+
+
+    return data
+
 def process_multiple_pdfs(uploaded_files) -> Tuple[List[Dict], List[str]]:
     """
-    Process multiple PDF files
+    Process multiple PDF files in parallel
     Returns: (list_of_data_dicts, list_of_error_messages)
     """
     all_data = []
     errors = []
-    
+
     # Create progress bar
     progress_bar = st.progress(0)
     status_text = st.empty()
-    
-    for idx, uploaded_file in enumerate(uploaded_files):
-        # Update progress
-        progress = (idx + 1) / len(uploaded_files)
-        progress_bar.progress(progress)
-        status_text.text(f"Processing file {idx + 1} of {len(uploaded_files)}: {uploaded_file.name}")
-        
-        # Extract data from current file
-        data, error, _ = extract_fields_from_pdf(uploaded_file)
-        
+
+    # Read each upload on the main thread (getvalue() is the only copy
+    # made; UploadedFile readers are not thread-safe at the pointer level)
+    payloads = [(f.getvalue(), f.name) for f in uploaded_files]
+
+    # Each file is independent and PyMuPDF releases the GIL in its C code,
+    # so parse the batch concurrently and report progress as futures finish
+    max_workers = min(8, len(uploaded_files))
+    results = [None] * len(uploaded_files)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(extract_fields_from_pdf, file_bytes, name): i
+            for i, (file_bytes, name) in enumerate(payloads)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            progress_bar.progress(done / len(uploaded_files))
+            status_text.text(f"Processed {done} of {len(uploaded_files)} file(s)")
+
+    # Collect results in upload order (extract_fields_from_pdf returns an
+    # error message instead of raising, so no extra handling is needed here)
+    for uploaded_file, (data, error, preview) in zip(uploaded_files, results):
         if error:
             errors.append(f"{uploaded_file.name}: {error}")
         else:
+            # Keep the text preview so the debug expander can show it
+            # without re-extracting the PDF
+            data["_preview"] = preview
             all_data.append(data)
-    
+
     # Clear progress indicators
     progress_bar.empty()
     status_text.empty()
-    
+
     return all_data, errors
 
+@st.cache_data(show_spinner=False)
 def create_excel_file(all_data: List[Dict]) -> bytes:
     """
-    Create Excel file with all extracted data
+    Create Excel file with all extracted data (cached so re-downloads
+    reuse the serialized bytes)
     """
     if not all_data:
         return b""
-    
-    # Ensure all required fields exist
-    required_fields = [
-        "File Name", "Inspection No.", "Inspection Seq.", "Inspection Date",
-        "PO / Split No.", "Style No.", "Item No.", 
-        "Delivered Quantity", "Customer", "Dept", "Factory", 
-        "FID Code", "Vendor", "Quality Digit"
-    ]
-    
-    # Add missing fields to each data dict
-    for data in all_data:
-        for field in required_fields:
-            if field not in data:
-                data[field] = ""
-    
-    # Create DataFrame
-    df = pd.DataFrame(all_data)
-    df = df[required_fields]
-    
-    # Create Excel writer
+
+    required_fields = ["File Name"] + EXTRACTED_FIELDS
+
+    # Materialize the cell grid once; both the width calculation and the
+    # row writes reuse it instead of repeating the dict lookups
+    rows = [[data.get(field, "") for field in required_fields] for data in all_data]
+
+    # constant_memory streams each row out as soon as it is written, and
+    # disabling URL/formula detection skips xlsxwriter's per-string scans
     output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='Extracted Data', index=False)
-        
-        # Auto-adjust column widths
-        worksheet = writer.sheets['Extracted Data']
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if cell.value and len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
-    
+    workbook = xlsxwriter.Workbook(output, {
+        'constant_memory': True,
+        'strings_to_urls': False,
+        'strings_to_formulas': False,
+    })
+    worksheet = workbook.add_worksheet('Extracted Data')
+
+    # Auto-adjust column widths (must be set before the rows are written)
+    for col_idx, field in enumerate(required_fields):
+        max_length = max((len(str(row[col_idx])) for row in rows), default=0)
+        max_length = max(max_length, len(field))
+        worksheet.set_column(col_idx, col_idx, min(max_length + 2, 50))
+
+    worksheet.write_row(0, 0, required_fields)
+    for row_idx, row in enumerate(rows, start=1):
+        worksheet.write_row(row_idx, 0, row)
+
+    workbook.close()
     return output.getvalue()
 
 # Main application area
@@ -354,117 +689,144 @@ if uploaded_files:
         for i, file in enumerate(uploaded_files):
             st.write(f"{i+1}. {file.name} ({file.size / 1024:.1f} KB)")
     
+    # Identity of the current upload set, so persisted results can be
+    # discarded when the user changes the selected files; file_id is
+    # unique per upload, so re-uploading a same-named file still misses
+    upload_key = tuple(f.file_id for f in uploaded_files)
+
     # Extract button
     if st.button("🚀 Extract Fields from All Files", type="primary", use_container_width=True):
-        # Process all files
+        # Process all files and persist the results, so UI-only reruns
+        # (checkbox toggles, download clicks) re-render without re-extracting
         all_data, errors = process_multiple_pdfs(uploaded_files)
+        st.session_state["all_data"] = all_data
+        st.session_state["errors"] = errors
+        st.session_state["upload_key"] = upload_key
+
+    if st.session_state.get("upload_key") != upload_key:
+        # Persisted results belong to a different upload set; drop them
+        st.session_state.pop("all_data", None)
+        st.session_state.pop("errors", None)
+        st.session_state.pop("upload_key", None)
+
+    all_data = st.session_state.get("all_data")
+    errors = st.session_state.get("errors")
+
+    if errors:
+        st.error("Some files had issues during processing:")
+        for error in errors:
+            st.error(f"• {error}")
+    
+    if all_data:
+        st.success(f"✅ Successfully extracted data from {len(all_data)} file(s)!")
+        
+        # Display summary statistics
+        extracted_count = sum(1 for data in all_data if any(data.get(field, "") for field in [
+            "Inspection No.", "PO / Split No.", "Style No.", "Item No."
+        ]))
+        
+        st.info(f"**Summary:** {extracted_count} of {len(uploaded_files)} files had extractable data")
+        
+        # Create expandable preview of extracted data
+        with st.expander("📊 Preview Extracted Data", expanded=True):
+            # Convert to DataFrame for display (pandas is only needed
+            # here, so it is not imported until results exist)
+            import pandas as pd
+            display_columns = ["File Name", "Inspection No.", "Style No.", "Item No.",
+                              "Customer", "Factory", "Vendor"]
+            # from_records selects, orders and backfills the display
+            # columns in one step, with no fill loop or reindex
+            preview_df = pd.DataFrame.from_records(all_data, columns=display_columns).fillna("")
+            if not preview_df.empty:
+                # Only ship the first rows to the browser; rendering the
+                # full table is opt-in so big batches stay responsive
+                preview_n = 50
+                show_all = len(preview_df) <= preview_n or st.checkbox("Show all rows")
+                if not show_all:
+                    st.caption(f"Showing first {preview_n} of {len(preview_df)} rows")
+                st.dataframe(
+                    preview_df if show_all else preview_df.head(preview_n),
+                    use_container_width=True,
+                    hide_index=True
+                )
+        
+        # Create Excel file
+        excel_data = create_excel_file(all_data)
         
-        if errors:
-            st.error("Some files had issues during processing:")
-            for error in errors:
-                st.error(f"• {error}")
+        # Download button
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        excel_filename = f"AQL_Reports_Extracted_{timestamp}.xlsx"
         
-        if all_data:
-            st.success(f"✅ Successfully extracted data from {len(all_data)} file(s)!")
-            
-            # Display summary statistics
-            extracted_count = sum(1 for data in all_data if any(data.get(field, "") for field in [
-                "Inspection No.", "PO / Split No.", "Style No.", "Item No."
-            ]))
-            
-            st.info(f"**Summary:** {extracted_count} of {len(uploaded_files)} files had extractable data")
-            
-            # Create expandable preview of extracted data
-            with st.expander("📊 Preview Extracted Data", expanded=True):
-                # Convert to DataFrame for display
-                preview_df = pd.DataFrame(all_data)
-                if not preview_df.empty:
-                    # Reorder columns for better display
-                    display_columns = ["File Name", "Inspection No.", "Style No.", "Item No.", 
-                                      "Customer", "Factory", "Vendor"]
-                    available_columns = [col for col in display_columns if col in preview_df.columns]
+        st.download_button(
+            label="📥 Download Excel File",
+            data=excel_data,
+            file_name=excel_filename,
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            use_container_width=True
+        )
+        
+        # Show detailed results for each file
+        with st.expander("🔍 Detailed Results by File"):
+            for i, data in enumerate(all_data):
+                with st.container():
+                    st.subheader(f"File {i+1}: {data.get('File Name', 'Unknown')}")
                     
-                    if available_columns:
-                        st.dataframe(
-                            preview_df[available_columns],
-                            use_container_width=True,
-                            hide_index=True
-                        )
-            
-            # Create Excel file
-            excel_data = create_excel_file(all_data)
-            
-            # Download button
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            excel_filename = f"AQL_Reports_Extracted_{timestamp}.xlsx"
-            
-            st.download_button(
-                label="📥 Download Excel File",
-                data=excel_data,
-                file_name=excel_filename,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
-            
-            # Show detailed results for each file
-            with st.expander("🔍 Detailed Results by File"):
-                for i, data in enumerate(all_data):
-                    with st.container():
-                        st.subheader(f"File {i+1}: {data.get('File Name', 'Unknown')}")
-                        
-                        # Create two columns for field display
-                        col1, col2 = st.columns(2)
-                        
-                        # First column fields
-                        with col1:
-                            fields_col1 = [
-                                ("Inspection No.", data.get("Inspection No.", "")),
-                                ("Inspection Seq.", data.get("Inspection Seq.", "")),
-                                ("Inspection Date", data.get("Inspection Date", "")),
-                                ("PO / Split No.", data.get("PO / Split No.", "")),
-                                ("Style No.", data.get("Style No.", "")),
-                                ("Item No.", data.get("Item No.", "")),
-                                ("Delivered Quantity", data.get("Delivered Quantity", ""))
-                            ]
-                            
-                            for field_name, field_value in fields_col1:
-                                if field_value:
-                                    st.success(f"**{field_name}:** {field_value}")
-                                else:
-                                    st.warning(f"**{field_name}:** Not extracted")
+                    # Create two columns for field display
+                    col1, col2 = st.columns(2)
+                    
+                    # First column fields
+                    with col1:
+                        fields_col1 = [
+                            ("Inspection No.", data.get("Inspection No.", "")),
+                            ("Inspection Seq.", data.get("Inspection Seq.", "")),
+                            ("Inspection Date", data.get("Inspection Date", "")),
+                            ("PO / Split No.", data.get("PO / Split No.", "")),
+                            ("Style No.", data.get("Style No.", "")),
+                            ("Item No.", data.get("Item No.", "")),
+                            ("Delivered Quantity", data.get("Delivered Quantity", ""))
+                        ]
                         
-                        # Second column fields
-                        with col2:
-                            fields_col2 = [
-                                ("Customer", data.get("Customer", "")),
-                                ("Dept", data.get("Dept", "")),
-                                ("Factory", data.get("Factory", "")),
-                                ("FID Code", data.get("FID Code", "")),
-                                ("Vendor", data.get("Vendor", "")),
-                                ("Quality Digit", data.get("Quality Digit", ""))
-                            ]
-                            
-                            for field_name, field_value in fields_col2:
-                                if field_value:
-                                    st.success(f"**{field_name}:** {field_value}")
-                                else:
-                                    st.warning(f"**{field_name}:** Not extracted")
+                        for field_name, field_value in fields_col1:
+                            if field_value:
+                                st.success(f"**{field_name}:** {field_value}")
+                            else:
+                                st.warning(f"**{field_name}:** Not extracted")
+                    
+                    # Second column fields
+                    with col2:
+                        fields_col2 = [
+                            ("Customer", data.get("Customer", "")),
+                            ("Dept", data.get("Dept", "")),
+                            ("Factory", data.get("Factory", "")),
+                            ("FID Code", data.get("FID Code", "")),
+                            ("Vendor", data.get("Vendor", "")),
+                            ("Quality Digit", data.get("Quality Digit", ""))
+                        ]
                         
-                        st.markdown("---")
-            
-            # Optional: Show raw text extraction for debugging
-            with st.expander("🔧 Debug: View Extracted Text Samples"):
-                for i, uploaded_file in enumerate(uploaded_files[:3]):  # Limit to first 3 files
-                    uploaded_file.seek(0)  # Reset file pointer
-                    data, error, text_preview = extract_fields_from_pdf(uploaded_file)
+                        for field_name, field_value in fields_col2:
+                            if field_value:
+                                st.success(f"**{field_name}:** {field_value}")
+                            else:
+                                st.warning(f"**{field_name}:** Not extracted")
                     
-                    st.write(f"**File {i+1}: {uploaded_file.name}**")
+                    st.markdown("---")
+        
+        # Optional: Show raw text extraction for debugging (off by default
+        # so the common path skips the preview work entirely)
+        debug_on = st.checkbox("Enable debug text samples", value=False)
+        if debug_on:
+            with st.expander("🔧 Debug: View Extracted Text Samples", expanded=True):
+                samples = all_data[:3]  # Limit to first 3 files
+                for i, data in enumerate(samples):
+                    text_preview = data.get("_preview", "")
+
+                    st.write(f"**File {i+1}: {data.get('File Name', 'Unknown')}**")
                     if text_preview:
                         st.text_area("", text_preview, height=150, key=f"text_preview_{i}")
                     else:
                         st.warning("No text extracted")
-                    
-                    if i < 2 and i < len(uploaded_files) - 1:  # Don't add after last item
+
+                    if i < len(samples) - 1:  # Don't add after last item
                         st.markdown("---")
 else:
     # Show upload instructions
@@ -500,7 +862,7 @@ else:
 st.markdown("---")
 st.markdown("""
 <div style='text-align: center'>
-    <p>AQL Inspection Report Extractor | Built with Streamlit, pdfplumber, pandas</p>
+    <p>AQL Inspection Report Extractor | Built with Streamlit, PyMuPDF, pandas</p>
     <p>Version 2.0 | Multi-file Support | © 2024</p>
 </div>
 """, unsafe_allow_html=True)